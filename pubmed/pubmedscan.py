@@ -0,0 +1,173 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2020,  Magic Fang, magicfang@gmail.com
+#
+# Distributed under terms of the GPL-3 license.
+
+import re
+import sys
+import argparse
+import gzip
+
+class PubmedScanner:
+    """ Pubmed XML raw bytes scanner
+
+    Split a Pubmed XML byte stream on <PubmedArticle> boundaries without building a DOM,
+    for jobs which only route or filter whole articles by PMID.
+    Each article is returned as a memoryview slice of the read buffer, so it could be
+    written to another file as is, without re-serializing.
+
+    >>> pmsc = PubmedScanner(fn='pubmed20n001.xml.gz')
+    >>> for pmid, article in pmsc.scan():
+    ...     print(pmid, len(article))
+    >>> print(pmsc.deleted)
+
+    >>> pmsc = PubmedScanner(fn='pubmed20n001.xml.gz')
+    >>> with open('subset.xml', 'wb') as out:
+    ...     pmsc.subset(['00018862', '00018863'], out)
+    """
+    START = b'<PubmedArticle>'
+    END = b'</PubmedArticle>'
+    SETSTART = b'<PubmedArticleSet>'
+    SETEND = b'</PubmedArticleSet>'
+    DELSTART = b'<DeleteCitation>'
+    DELEND = b'</DeleteCitation>'
+    DELPMID = re.compile(rb'<PMID[^>]*>\s*(\d+)\s*</PMID>')
+    # Read size of every chunk from the (decompressed) stream
+    CHUNKSIZE = 1 << 22
+
+    def __init__(self, fn='', fh=None, chunksize=0):
+        """ PubmedScanner in initiation
+
+        fn: XML file name
+        fh: XML file handle, opened in binary mode
+        chunksize: bytes read from the stream each time, default CHUNKSIZE
+        Support text or gzip XML file format to fh or fn, if not fn or fh
+        would get bytes from sys.stdin
+        """
+        self.fn = fn
+        self.fh = fh
+        self.chunksize = chunksize or self.CHUNKSIZE
+        if self.fn:
+            if self.fn.endswith('.gz'):
+                self.fh = gzip.open(self.fn, "rb")
+            else:
+                self.fh = open(self.fn, "rb")
+        elif not self.fh:
+            self.fh = sys.stdin.buffer
+        elif hasattr(self.fh, 'buffer'):
+            self.fh = self.fh.buffer
+        # Bytes before the first article: XML declaration, DOCTYPE and <PubmedArticleSet>
+        self.header = None
+        # PMIDs in <DeleteCitation>, available after scan() finished
+        self.deleted = []
+
+    def pmid(self, buf, start, end):
+        """ Get the PMID of an article
+
+        buf: bytes buffer
+        start: article start position in buf
+        end: article end position in buf
+        return: PMID string, format as Record PMID: '{:0>8s}'
+        The first <PMID> in <PubmedArticle> is the one of MedlineCitation,
+        the others are in CommentsCorrections or references.
+        """
+        pos = buf.find(b'<PMID', start, end)
+        if pos < 0:
+            return ''
+        pos = buf.find(b'>', pos, end) + 1
+        last = buf.find(b'</PMID>', pos, end)
+        return "{:0>8s}".format(buf[pos:last].strip().decode())
+
+    def between(self, buf, start, end):
+        """ Process bytes out of articles
+
+        buf: bytes buffer
+        start: start position in buf
+        end: end position in buf
+        Keep the header before the first article and collect deleted PMIDs.
+        """
+        if self.header is None:
+            self.header = buf[start:end].rstrip() + b'\n'
+        pos = buf.find(self.DELSTART, start, end)
+        while pos >= 0:
+            last = buf.find(self.DELEND, pos, end)
+            if last < 0:
+                last = end
+            for pmid in self.DELPMID.findall(buf, pos, last):
+                self.deleted.append("{:0>8s}".format(pmid.decode()))
+            pos = buf.find(self.DELSTART, last, end)
+
+    def scan(self):
+        """ Scan Pubmed XML to article bytes
+
+        return: (PMID, memoryview of <PubmedArticle>...</PubmedArticle>) iteration list
+        The memoryview refers to an immutable chunk buffer, it keeps valid after iteration.
+        """
+        buf, view, pos, eof = b'', None, 0, False
+        self.header, self.deleted = None, []
+        while True:
+            start = buf.find(self.START, pos)
+            end = buf.find(self.END, start) if start >= 0 else -1
+            if end < 0:
+                if eof:
+                    break
+                chunk = self.fh.read(self.chunksize)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                view = memoryview(buf)
+                continue
+            end += len(self.END)
+            self.between(buf, pos, start)
+            yield self.pmid(buf, start, end), view[start:end]
+            pos = end
+        if self.header is None:
+            last = buf.find(self.SETSTART, pos)
+            self.header = buf[pos:last+len(self.SETSTART)] + b'\n' if last >= 0 else b''
+            pos = last + len(self.SETSTART) if last >= 0 else len(buf)
+        self.between(buf, pos, len(buf))
+
+    def subset(self, pmids, fh):
+        """ Write articles of given PMIDs to a new Pubmed XML
+
+        pmids: PMID list or set, format as Record PMID: '{:0>8s}'
+        fh: output file handle, opened in binary mode
+        return: number of articles written
+        """
+        pmids, count, started = set(pmids), 0, False
+        for pmid, article in self.scan():
+            if not started:
+                fh.write(self.header)
+                started = True
+            if pmid in pmids:
+                fh.write(article)
+                fh.write(b'\n')
+                count += 1
+        if not started:
+            fh.write(self.header)
+        fh.write(self.SETEND + b'\n')
+        return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-i", "--infile")
+    parser.add_argument("-l", "--list", help="PMID list file, one PMID per line")
+    parser.add_argument("-o", "--outfile", help="subset XML file, write PMID list if not given")
+    args = parser.parse_args()
+    psc = PubmedScanner(args.infile)
+    if args.list and args.outfile:
+        with open(args.list, "rt") as fh:
+            pmids = ["{:0>8s}".format(ln.strip()) for ln in fh if ln.strip()]
+        if args.outfile.endswith('.gz'):
+            out = gzip.open(args.outfile, "wb")
+        else:
+            out = open(args.outfile, "wb")
+        with out:
+            psc.subset(pmids, out)
+    else:
+        for pmid, article in psc.scan():
+            print(pmid)
+        for pmid in psc.deleted:
+            print(pmid, "deleted", sep="\t")